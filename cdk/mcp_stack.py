@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
-from platform import system
-
 import aws_cdk as cdk
 from aws_cdk import (
     Stack,
     aws_lambda as _lambda,
     aws_iam as iam,
-    aws_apigateway as apigw,
+    aws_apigatewayv2 as apigwv2,
+    aws_apigatewayv2_integrations as apigwv2_integrations,
 )
 from constructs import Construct
 import os
+import shutil
+import subprocess
 
 
 class BedrockMcpStack(Stack):
@@ -27,16 +28,28 @@ class BedrockMcpStack(Stack):
         mcp_lambda = _lambda.Function(
             self, "BedrockMcpFunction",
             runtime=_lambda.Runtime.PYTHON_3_11,
+            architecture=_lambda.Architecture.ARM_64,
+            # Graviton is cheaper and generally faster for Python
             code=_lambda.Code.from_asset("../lambda"),
             handler="mcp_handler.handler",
-            memory_size=1024,
-            # Increased memory for MCP processing
+            memory_size=3008,
+            # Lambda CPU scales with memory, so this also speeds up
+            # the import-heavy cold start
             timeout=cdk.Duration.seconds(120),
             # Increased timeout for API calls
             layers=[layer],
             # Add the dependencies layer
         )
 
+        # Keep warm execution environments ready so user-facing requests
+        # skip the cold start entirely
+        alias = _lambda.Alias(
+            self, "BedrockMcpLiveAlias",
+            alias_name="live",
+            version=mcp_lambda.current_version,
+            provisioned_concurrent_executions=2
+        )
+
         # Output the API URL
         cdk.CfnOutput(
             self, "FunctionName",
@@ -57,13 +70,12 @@ class BedrockMcpStack(Stack):
             )
         )
 
-        # Create an API Gateway to expose the Lambda
-        api = apigw.LambdaRestApi(
+        # Create an HTTP API (v2) to expose the Lambda - lower per-request
+        # latency and cost than the REST API flavour
+        api = apigwv2.HttpApi(
             self, "BedrockMcpApi",
-            handler=mcp_lambda,
-            proxy=True,
-            deploy_options=apigw.StageOptions(
-                stage_name="prod"
+            default_integration=apigwv2_integrations.HttpLambdaIntegration(
+                "BedrockMcpIntegration", alias
             )
         )
 
@@ -81,9 +93,53 @@ class BedrockMcpStack(Stack):
         python_dir = os.path.join(layer_dir, "python")
         os.makedirs(python_dir, exist_ok=True)
 
-        # Install dependencies with platform-specific flags for Lambda compatibility
-        os.system(
-            f"pip install --platform manylinux2014_x86_64 --implementation cp --python-version 3.11 --only-binary=:all: --target {python_dir} -r {requirements_path}")
+        # Install dependencies with platform-specific flags for Lambda
+        # compatibility; prefer uv, which installs far faster than pip
+        if shutil.which("uv"):
+            subprocess.run([
+                "uv", "pip", "install",
+                "--python-platform", "aarch64-manylinux2014",
+                "--python-version", "3.11",
+                "--only-binary", ":all:",
+                "--target", python_dir,
+                "-r", requirements_path
+            ], check=True)
+        else:
+            subprocess.run([
+                "pip", "install",
+                "--platform", "manylinux2014_aarch64",
+                "--implementation", "cp",
+                "--python-version", "3.11",
+                "--only-binary=:all:",
+                "--target", python_dir,
+                "-r", requirements_path
+            ], check=True)
+
+        # Prune files the runtime never imports so cold starts fault in
+        # fewer layer chunks
+        os.system(f"find {python_dir} -type d -name '__pycache__' -exec rm -rf {{}} +")
+        os.system(f"find {python_dir} -type d -name 'tests' -exec rm -rf {{}} +")
+        os.system(f"find {python_dir} -type d -name '*.dist-info' -exec rm -rf {{}} +")
+        os.system(f"find {python_dir} -name '*.pyc' -delete")
+        os.system(f"find {python_dir} -name '*.pyi' -delete")
+
+        # botocore ships a JSON model for every AWS service; keep only the
+        # services this function can call plus the shared top-level files
+        data_dir = os.path.join(python_dir, "botocore", "data")
+        if os.path.isdir(data_dir):
+            keep_services = {"bedrock-runtime", "sts"}
+            for entry in os.listdir(data_dir):
+                entry_path = os.path.join(data_dir, entry)
+                if os.path.isdir(entry_path) and entry not in keep_services:
+                    shutil.rmtree(entry_path)
+
+        # Normalize timestamps so the zipped asset hashes identically across
+        # builds and CDK only re-uploads the layer when its contents change
+        fixed_mtime = 1577836800  # 2020-01-01T00:00:00Z
+        for root, dirs, files in os.walk(layer_dir):
+            for name in dirs + files:
+                os.utime(os.path.join(root, name), (fixed_mtime, fixed_mtime))
+        os.utime(layer_dir, (fixed_mtime, fixed_mtime))
 
         # Create the layer
         return _lambda.LayerVersion(
@@ -1,15 +1,33 @@
+import json
 import logging
 import sys
 
+
+class _JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON, with the message safely escaped."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "t": self.formatTime(record),
+            "l": record.levelname,
+            "m": record.getMessage(),
+        })
+
+
 # Initialize logger
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
 
-# Remove default handlers
-for handler in logger.handlers:
-    logger.removeHandler(handler)
+# Configure once per process - re-imports must not stack extra handlers,
+# since every duplicate handler doubles synchronous log I/O
+if not getattr(logger, "_mcp_configured", False):
+    logger.setLevel(logging.INFO)
+
+    # Drop any pre-installed handlers so each record is written exactly once
+    logger.handlers.clear()
+
+    # Create a handler that writes to stderr (Lambda captures this)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(_JsonFormatter())
+    logger.addHandler(handler)
 
-# Create a handler that writes to stderr (Lambda captures this)
-handler = logging.StreamHandler(sys.stderr)
-handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
-logger.addHandler(handler)
\ No newline at end of file
+    logger._mcp_configured = True
@@ -1,51 +1,62 @@
+import asyncio
+import io
+import json
+import os
 from typing import Optional, List, Dict, Any
 from contextlib import AsyncExitStack
 from dataclasses import dataclass
 
-# to interact with MCP
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
 from logging_utils import logger
 
-import boto3
+import aioboto3
+from botocore.config import Config
+
+# Shared session and client config, created once at import time (Lambda INIT
+# phase); the async client itself is opened per MCPClient in connect_to_server
+# and kept alive on its exit stack across warm invocations
+_SESSION = aioboto3.Session()
+_BEDROCK_CONFIG = Config(retries={'max_attempts': 2}, tcp_keepalive=True)
 
-@dataclass
 class Message:
-    role: str
-    content: List[Dict[str, Any]]
-
-    @classmethod
-    def user(cls, text: str) -> 'Message':
-        return cls(role="user", content=[{"text": text}])
-
-    @classmethod
-    def assistant(cls, text: str) -> 'Message':
-        return cls(role="assistant", content=[{"text": text}])
-
-    @classmethod
-    def tool_result(cls, tool_use_id: str, content: dict) -> 'Message':
-        return cls(
-            role="user",
-            content=[{
+    """Factories for Bedrock converse message dicts.
+
+    These return plain dicts ready for the messages list, avoiding the
+    dataclass-plus-__dict__ round trip that allocated an extra object and
+    dict per message on the chat loop.
+    """
+
+    @staticmethod
+    def user(text: str) -> Dict[str, Any]:
+        return {"role": "user", "content": [{"text": text}]}
+
+    @staticmethod
+    def assistant(text: str) -> Dict[str, Any]:
+        return {"role": "assistant", "content": [{"text": text}]}
+
+    @staticmethod
+    def tool_result(tool_use_id: str, content: list) -> Dict[str, Any]:
+        return {
+            "role": "user",
+            "content": [{
                 "toolResult": {
                     "toolUseId": tool_use_id,
                     "content": [{"json": {"text": content[0].text}}]
                 }
             }]
-        )
+        }
 
-    @classmethod
-    def tool_request(cls, tool_use_id: str, name: str, input_data: dict) -> 'Message':
-        return cls(
-            role="assistant",
-            content=[{
+    @staticmethod
+    def tool_request(tool_use_id: str, name: str, input_data: dict) -> Dict[str, Any]:
+        return {
+            "role": "assistant",
+            "content": [{
                 "toolUse": {
                     "toolUseId": tool_use_id,
                     "name": name,
                     "input": input_data
                 }
             }]
-        )
+        }
 
     @staticmethod
     def to_bedrock_format(tools_list: List[Dict]) -> List[Dict]:
@@ -64,20 +75,125 @@ class Message:
         } for tool in tools_list]
 
 
+@dataclass
+class LocalTool:
+    name: str
+    description: str
+    inputSchema: Dict[str, Any]
+
+
+@dataclass
+class LocalToolList:
+    tools: List[LocalTool]
+
+
+@dataclass
+class LocalTextContent:
+    text: str
+
+
+@dataclass
+class LocalToolResult:
+    content: List[LocalTextContent]
+
+
+class LocalSession:
+    """In-process stand-in for an MCP ClientSession.
+
+    The bundled mcp_server runs inside the same Lambda sandbox as the client,
+    so instead of forking it as a stdio subprocess and round-tripping JSON-RPC
+    over pipes, dispatch tool calls straight to its coroutines.
+    """
+
+    def __init__(self):
+        import mcp_server
+        self._tools = {
+            "get_alerts": mcp_server.get_alerts,
+            "get_forecast": mcp_server.get_forecast,
+            "visit_webpage": mcp_server.visit_webpage,
+        }
+        self._specs = [
+            LocalTool(
+                name="get_alerts",
+                description=mcp_server.get_alerts.__doc__,
+                inputSchema={
+                    "type": "object",
+                    "properties": {"state": {"type": "string"}},
+                    "required": ["state"]
+                }
+            ),
+            LocalTool(
+                name="get_forecast",
+                description=mcp_server.get_forecast.__doc__,
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "latitude": {"type": "number"},
+                        "longitude": {"type": "number"}
+                    },
+                    "required": ["latitude", "longitude"]
+                }
+            ),
+            LocalTool(
+                name="visit_webpage",
+                description=mcp_server.visit_webpage.__doc__,
+                inputSchema={
+                    "type": "object",
+                    "properties": {"url": {"type": "string"}},
+                    "required": ["url"]
+                }
+            ),
+        ]
+
+    async def list_tools(self) -> LocalToolList:
+        return LocalToolList(tools=self._specs)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> LocalToolResult:
+        if name not in self._tools:
+            raise ValueError(f"Unknown tool: {name}")
+        result = await self._tools[name](**arguments)
+        return LocalToolResult(content=[LocalTextContent(text=result)])
+
+
 class MCPClient:
     MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+    MAX_TURNS = 10
 
     def __init__(self):
-        self.session: Optional[ClientSession] = None
+        self.session: Optional[Any] = None
         self.exit_stack = AsyncExitStack()
-        self.bedrock = boto3.client(service_name='bedrock-runtime', region_name='us-east-1')
+        self.bedrock: Optional[Any] = None
+        self._bedrock_tools: Optional[List[Dict]] = None
 
-    async def connect_to_server(self, server_script_path: str):
+    async def connect_to_server(self, server_script_path: str, use_stdio: bool = False):
         if not server_script_path.endswith(('.py', '.js')):
             raise ValueError("Server script must be a .py or .js file")
 
+        # Open the async Bedrock client and keep it alive on the exit stack
+        # so its pooled connections survive across warm invocations
+        if self.bedrock is None:
+            self.bedrock = await self.exit_stack.enter_async_context(
+                _SESSION.client(
+                    service_name='bedrock-runtime',
+                    region_name='us-east-1',
+                    config=_BEDROCK_CONFIG
+                )
+            )
+
+        # The co-located server shares this sandbox, so call it in-process
+        # unless the caller explicitly asks for a stdio subprocess
+        local_server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp_server.py')
+        if not use_stdio and os.path.abspath(server_script_path) == local_server:
+            logger.info("MCP client using in-process server session")
+            self.session = LocalSession()
+            return
+
+        # to interact with external MCP servers over stdio
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
         # Determine the command to run based on the server script extension
-        logger.info(f"MCP client running server script: {server_script_path}")
+        logger.info("MCP client running server script: %s", server_script_path)
         command = "python" if server_script_path.endswith('.py') else "node"
         server_params = StdioServerParameters(command=command, args=[server_script_path], env=None)
 
@@ -89,93 +205,175 @@ class MCPClient:
     async def cleanup(self):
         await self.exit_stack.aclose()
 
-    def _make_bedrock_request(self, messages: List[Dict], tools: List[Dict]) -> Dict:
-        return self.bedrock.converse(
+    async def _make_bedrock_request(self, messages: List[Dict], tools: List[Dict]) -> Dict:
+        response = await self.bedrock.converse_stream(
             modelId=self.MODEL_ID,
             messages=messages,
             inferenceConfig={"maxTokens": 1000, "temperature": 0},
             toolConfig={"tools": tools}
         )
+        return await self._collect_stream(response['stream'])
 
-    async def process_query(self, query: str) -> str:
-        logger.info(f"Processing query: {query}")
-        messages = [Message.user(query).__dict__]
-        response = await self.session.list_tools()
-
-        available_tools = [{
-            "name": tool.name,
-            "description": tool.description,
-            "input_schema": tool.inputSchema
-        } for tool in response.tools]
-        logger.info(f"Available tools: {available_tools}")
-        bedrock_tools = Message.to_bedrock_format(available_tools)
+    @staticmethod
+    async def _collect_stream(stream: Any) -> Dict:
+        """Fold converse_stream events back into a converse-shaped response.
+
+        Streaming lets us start consuming tokens as soon as the model emits
+        them instead of waiting for the full response to be buffered, while
+        _process_response keeps working on the familiar response dict.
+        """
+        content: List[Dict[str, Any]] = []
+        text_parts: Optional[List[str]] = None
+        tool_use: Optional[Dict[str, Any]] = None
+        tool_input_parts: List[str] = []
+        stop_reason = 'end_turn'
+
+        async for event in stream:
+            if 'contentBlockStart' in event:
+                start = event['contentBlockStart'].get('start', {})
+                if 'toolUse' in start:
+                    tool_use = dict(start['toolUse'])
+                    tool_input_parts = []
+            elif 'contentBlockDelta' in event:
+                delta = event['contentBlockDelta']['delta']
+                if 'text' in delta:
+                    if text_parts is None:
+                        text_parts = []
+                    text_parts.append(delta['text'])
+                elif 'toolUse' in delta and tool_use is not None:
+                    tool_input_parts.append(delta['toolUse']['input'])
+            elif 'contentBlockStop' in event:
+                if tool_use is not None:
+                    raw_input = ''.join(tool_input_parts)
+                    tool_use['input'] = json.loads(raw_input) if raw_input else {}
+                    content.append({'toolUse': tool_use})
+                    tool_use = None
+                elif text_parts is not None:
+                    content.append({'text': ''.join(text_parts)})
+                    text_parts = None
+            elif 'messageStop' in event:
+                stop_reason = event['messageStop']['stopReason']
+
+        # Flush a trailing text block if the stream ended without a stop event
+        if text_parts:
+            content.append({'text': ''.join(text_parts)})
+
+        return {
+            'stopReason': stop_reason,
+            'output': {'message': {'role': 'assistant', 'content': content}}
+        }
 
-        response = self._make_bedrock_request(messages, bedrock_tools)
-        logger.info(f"Bedrock response: {response}")
+    async def process_query(self, query: str) -> str:
+        logger.info("Processing query: %s", query)
+        messages = [Message.user(query)]
+
+        # The tool catalog is static for the lifetime of the server, so list
+        # and convert it once and reuse the result on every later query
+        if self._bedrock_tools is None:
+            response = await self.session.list_tools()
+
+            available_tools = [{
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": tool.inputSchema
+            } for tool in response.tools]
+            logger.debug("Available tools: %s", available_tools)
+            self._bedrock_tools = Message.to_bedrock_format(available_tools)
+        bedrock_tools = self._bedrock_tools
+
+        response = await self._make_bedrock_request(messages, bedrock_tools)
+        logger.info("Bedrock response stop_reason=%s", response['stopReason'])
+        logger.debug("Bedrock response: %s", response)
 
         return await self._process_response(
             response, messages, bedrock_tools
         )
 
     async def _process_response(self, response: Dict, messages: List[Dict], bedrock_tools: List[Dict]) -> str:
-        final_text = []
-        MAX_TURNS = 10
+        # Write straight into one growable buffer rather than collecting
+        # fragments in a list and joining at the end
+        final_text = io.StringIO()
         turn_count = 0
 
-        logger.info(f"Processing response: {response}")
+        def emit(text: str) -> None:
+            if final_text.tell():
+                final_text.write("\n\n")
+            final_text.write(text)
+
+        logger.debug("Processing response: %s", response)
 
         while True:
             if response['stopReason'] == 'tool_use':
-                final_text.append("received toolUse request")
+                emit("received toolUse request")
+                tool_items = []
                 for item in response['output']['message']['content']:
                     if 'text' in item:
-                        logger.info(f"Received toolUse request: {item['text']}")
-                        final_text.append(f"[Thinking: {item['text']}]")
-                        messages.append(Message.assistant(item['text']).__dict__)
+                        logger.info("Received toolUse request: %s", item['text'])
+                        emit(f"[Thinking: {item['text']}]")
+                        messages.append(Message.assistant(item['text']))
                     elif 'toolUse' in item:
-                        logger.info(f"Received toolUse response: {item['toolUse']}")
-                        tool_info = item['toolUse']
-                        result = await self._handle_tool_call(tool_info, messages)
-                        final_text.extend(result)
-
-                        response = self._make_bedrock_request(messages, bedrock_tools)
+                        logger.debug("Received toolUse response: %s", item['toolUse'])
+                        tool_items.append(item['toolUse'])
+
+                if tool_items:
+                    if len(tool_items) == 1:
+                        # Single call - skip the task creation overhead of gather
+                        results = [await self._invoke_tool(tool_items[0])]
+                    else:
+                        # Overlap the I/O of the parallel tool requests; record
+                        # the messages in order afterwards so the transcript
+                        # stays deterministic
+                        results = await asyncio.gather(
+                            *(self._invoke_tool(tool_info) for tool_info in tool_items)
+                        )
+                    for tool_info, result in zip(tool_items, results):
+                        emit(self._record_tool_result(tool_info, result, messages))
+
+                    response = await self._make_bedrock_request(messages, bedrock_tools)
             elif response['stopReason'] == 'max_tokens':
                 logger.info("Max tokens reached, ending conversation.")
-                final_text.append("[Max tokens reached, ending conversation.]")
+                emit("[Max tokens reached, ending conversation.]")
                 break
             elif response['stopReason'] == 'stop_sequence':
                 logger.info("Stop sequence reached, ending conversation.")
-                final_text.append("[Stop sequence reached, ending conversation.]")
+                emit("[Stop sequence reached, ending conversation.]")
                 break
             elif response['stopReason'] == 'content_filtered':
                 logger.info("Content filtered, ending conversation.")
-                final_text.append("[Content filtered, ending conversation.]")
+                emit("[Content filtered, ending conversation.]")
                 break
             elif response['stopReason'] == 'end_turn':
                 logger.info("End turn reached, ending conversation.")
-                final_text.append(response['output']['message']['content'][0]['text'])
+                emit(response['output']['message']['content'][0]['text'])
                 break
 
             turn_count += 1
 
-            if turn_count >= MAX_TURNS:
+            if turn_count >= self.MAX_TURNS:
                 logger.info("Max turns reached, ending conversation.")
-                final_text.append("\n[Max turns reached, ending conversation.]")
+                emit("\n[Max turns reached, ending conversation.]")
                 break
-        return "\n\n".join(final_text)
+        return final_text.getvalue()
 
-    async def _handle_tool_call(self, tool_info: Dict, messages: List[Dict]) -> List[str]:
+    async def _invoke_tool(self, tool_info: Dict) -> Any:
         tool_name = tool_info['name']
         tool_args = tool_info['input']
-        tool_use_id = tool_info['toolUseId']
 
-        logger.info(f"Calling tool {tool_name} with args {tool_args}")
+        logger.info("Calling tool %s with args %s", tool_name, tool_args)
 
         result = await self.session.call_tool(tool_name, tool_args)
 
-        messages.append(Message.tool_request(tool_use_id, tool_name, tool_args).__dict__)
-        messages.append(Message.tool_result(tool_use_id, result.content).__dict__)
+        logger.info("Tool %s call completed", tool_name)
+        logger.debug("Tool %s result: %s", tool_name, result.content)
+
+        return result
+
+    def _record_tool_result(self, tool_info: Dict, result: Any, messages: List[Dict]) -> str:
+        tool_name = tool_info['name']
+        tool_args = tool_info['input']
+        tool_use_id = tool_info['toolUseId']
 
-        logger.info(f"Tool {tool_name} called with result {result.content}")
+        messages.append(Message.tool_request(tool_use_id, tool_name, tool_args))
+        messages.append(Message.tool_result(tool_use_id, result.content))
 
-        return [f"[Calling tool {tool_name} with args {tool_args}]"]
+        return f"[Calling tool {tool_name} with args {tool_args}]"
@@ -1,8 +1,20 @@
-import json
+import atexit
 import asyncio
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+try:
+    # Rust-backed encoder, several times faster than stdlib json
+    import orjson
+
+    def _dumps(obj: Dict[str, Any]) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson ships in the Lambda layer; fall back locally
+    import json
+
+    def _dumps(obj: Dict[str, Any]) -> str:
+        return json.dumps(obj)
 
 # Add the Lambda directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,6 +24,15 @@ sys.path.append("/opt/python")
 from mcp_client import MCPClient
 from logging_utils import logger
 
+# Cached MCP client, created lazily on the first invocation and reused by
+# warm Lambda containers so we don't pay client/server setup on every call
+_CLIENT: Optional[MCPClient] = None
+
+# Persistent event loop bound to the container - asyncio.run would build and
+# tear down a fresh loop (and everything living on it) every invocation
+_LOOP = asyncio.new_event_loop()
+asyncio.set_event_loop(_LOOP)
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda function that processes a query using the MCP client.
@@ -23,7 +44,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
     dict: Response with statusCode and body
     """
-    logger.info(f"Handling MCP event: {event}")
+    logger.debug("Handling MCP event: %s", event)
     # Extract query from event - handle both query and queryStringParameters
     query_params = event.get('queryStringParameters', {}) or {}
     query = query_params.get('query', '')
@@ -31,20 +52,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if not query:
         return {
             'statusCode': 400,
-            'body': json.dumps({
+            'body': _dumps({
                 'message': 'Missing query parameter',
                 'usage': 'Add a query parameter to your request'
             })
         }
     
     try:
-        # Run the MCP client with the query
-        result = asyncio.run(process_query(query))
-        logger.info(f"MCP event completed")
+        # Run the MCP client with the query on the container's event loop so
+        # the cached client's connections survive across invocations
+        result = _LOOP.run_until_complete(process_query(query))
+        logger.info("MCP event completed")
 
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': _dumps({
                 'query': query,
                 'result': result
             })
@@ -52,27 +74,39 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'message': 'Error processing query',
                 'error': str(e)
             })
         }
 
+async def _ensure_client() -> MCPClient:
+    """Create and connect the MCP client once, then reuse it while warm."""
+    global _CLIENT
+    if _CLIENT is None:
+        client = MCPClient()
+        server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp_server.py')
+        await client.connect_to_server(server_path)
+        _CLIENT = client
+    return _CLIENT
+
 async def process_query(query: str) -> str:
     """Process a query using the MCP client."""
-    logger.info(f"Process query: {query}")
+    logger.info("Process query: %s", query)
 
-    client = MCPClient()
-    try:
-        # Connect to the MCP server
-        server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp_server.py')
-        await client.connect_to_server(server_path)
-        
-        # Process the query
-        result = await client.process_query(query)
-        logger.info(f"Query completed")
-
-        return result
-    finally:
-        # Clean up resources
-        await client.cleanup()
+    client = await _ensure_client()
+
+    # Process the query - the client stays connected for the next invocation
+    result = await client.process_query(query)
+    logger.info("Query completed")
+
+    return result
+
+def _shutdown():
+    """Close the cached client when the container is torn down."""
+    global _CLIENT
+    if _CLIENT is not None:
+        client, _CLIENT = _CLIENT, None
+        _LOOP.run_until_complete(client.cleanup())
+
+atexit.register(_shutdown)
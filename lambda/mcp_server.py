@@ -1,18 +1,20 @@
 from typing import Any
-import sys
-
-# Ensure we can find packages in the Lambda layer
-sys.path.insert(0, '/opt/python')
+import atexit
+import asyncio
 
 import httpx
 from mcp.server.fastmcp import FastMCP
 
-import re
-import requests
-from markdownify import markdownify
-from requests.exceptions import RequestException
 from logging_utils import logger
 
+try:
+    # Rust-backed decoder, several times faster than stdlib json
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson ships in the Lambda layer; fall back locally
+    import json
+    _loads = json.loads
+
 # Initialize FastMCP server
 mcp = FastMCP("weather")
 
@@ -20,32 +22,89 @@ mcp = FastMCP("weather")
 NWS_API_BASE = "https://api.weather.gov"
 USER_AGENT = "weather-app/1.0"
 
+# Bound how much of any upstream response we hold in memory
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+MAX_ALERTS = 200
+
+# Shared HTTP client so repeated calls reuse pooled TCP/TLS connections
+# instead of paying a DNS lookup and handshake per request
+_HTTP = httpx.AsyncClient(
+    base_url=NWS_API_BASE,
+    headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=300),
+    follow_redirects=True
+)
+
+def _close_http():
+    """Close the pooled HTTP client when the process is torn down."""
+    try:
+        asyncio.get_event_loop().run_until_complete(_HTTP.aclose())
+    except Exception:
+        pass
+
+atexit.register(_close_http)
+
+async def _read_capped(response: httpx.Response, truncate: bool = False) -> bytes | None:
+    """Read a streamed response body up to MAX_RESPONSE_BYTES.
+
+    Oversized bodies are truncated when that still yields usable content
+    (e.g. HTML), otherwise discarded (e.g. JSON, which must parse whole).
+    """
+    buf = bytearray()
+    async for chunk in response.aiter_bytes(8192):
+        buf += chunk
+        if len(buf) > MAX_RESPONSE_BYTES:
+            if truncate:
+                logger.warning("Response exceeded %d bytes, truncating", MAX_RESPONSE_BYTES)
+                del buf[MAX_RESPONSE_BYTES:]
+                break
+            logger.warning("Response exceeded %d bytes, discarding", MAX_RESPONSE_BYTES)
+            return None
+    return bytes(buf)
+
 async def make_nws_request(url: str) -> dict[str, Any] | None:
-    logger.info(f"Making news request: {url}")
+    logger.info("Making news request: %s", url)
     """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, headers=headers, timeout=30.0)
+    try:
+        async with _HTTP.stream("GET", url) as response:
             response.raise_for_status()
-            logger.info(f"Response status: {response.status_code}")
-            return response.json()
-        except Exception:
+            logger.info("Response status: %s", response.status_code)
+            body = await _read_capped(response)
+        if body is None:
             return None
+        return _loads(body)
+    except Exception:
+        return None
+
+# Precompiled alert template - one format_map per feature instead of five
+# dict.get calls and an f-string interpolation each
+_ALERT_TEMPLATE = """
+Event: {event}
+Area: {areaDesc}
+Severity: {severity}
+Description: {description}
+Instructions: {instruction}
+"""
+
+class _AlertProps(dict):
+    """Alert properties with fallbacks for fields the NWS payload omits."""
+
+    _DEFAULTS = {
+        "event": "Unknown",
+        "areaDesc": "Unknown",
+        "severity": "Unknown",
+        "description": "No description available",
+        "instruction": "No specific instructions provided",
+    }
+
+    def __missing__(self, key: str) -> str:
+        return self._DEFAULTS.get(key, "Unknown")
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
-    props = feature["properties"]
-    return f"""
-Event: {props.get('event', 'Unknown')}
-Area: {props.get('areaDesc', 'Unknown')}
-Severity: {props.get('severity', 'Unknown')}
-Description: {props.get('description', 'No description available')}
-Instructions: {props.get('instruction', 'No specific instructions provided')}
-"""
+    return _ALERT_TEMPLATE.format_map(_AlertProps(feature["properties"]))
 
 @mcp.tool()
 async def get_alerts(state: str) -> str:
@@ -54,7 +113,7 @@ async def get_alerts(state: str) -> str:
     Args:
         state: Two-letter US state code (e.g. CA, NY)
     """
-    logger.info(f"Fetching alerts for state: {state}")
+    logger.info("Fetching alerts for state: %s", state)
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
     data = await make_nws_request(url)
 
@@ -64,9 +123,8 @@ async def get_alerts(state: str) -> str:
     if not data["features"]:
         return "No active alerts for this state."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
-    logger.info(f"Found {len(alerts)} alerts")
-    return "\n---\n".join(alerts)
+    logger.info("Found %d alerts", len(data["features"]))
+    return "\n---\n".join(map(format_alert, data["features"][:MAX_ALERTS]))
 
 @mcp.tool()
 async def get_forecast(latitude: float, longitude: float) -> str:
@@ -76,7 +134,7 @@ async def get_forecast(latitude: float, longitude: float) -> str:
         latitude: Latitude of the location
         longitude: Longitude of the location
     """
-    logger.info(f"Fetching forecast for latitude: {latitude}, longitude: {longitude}")
+    logger.info("Fetching forecast for latitude: %s, longitude: %s", latitude, longitude)
     # First get the forecast grid endpoint
     points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
     points_data = await make_nws_request(points_url)
@@ -103,11 +161,11 @@ Forecast: {period['detailedForecast']}
 """
         forecasts.append(forecast)
 
-    logger.info(f"Found {len(forecasts)} forecasts")
+    logger.info("Found %d forecasts", len(forecasts))
     return "\n---\n".join(forecasts)
 
 @mcp.tool()
-def visit_webpage(url: str) -> str:
+async def visit_webpage(url: str) -> str:
     """Visits a webpage at the given URL and returns its content as a markdown string.
 
     Args:
@@ -116,58 +174,40 @@ def visit_webpage(url: str) -> str:
     Returns:
         The content of the webpage converted to Markdown, or an error message if the request fails.
     """
-    logger.info(f"Visiting webpage: {url}")
+    logger.info("Visiting webpage: %s", url)
+    # Deferred import - only the webpage tool needs the extractor
+    import trafilatura
     try:
-        # Send a GET request to the URL
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()  # Raise an exception for bad status codes
-
-        # Convert the HTML content to Markdown
-        markdown_content = markdownify(response.text).strip()
-
-        # Remove multiple line breaks
-        markdown_content = re.sub(r"\n{3,}", "\n\n", markdown_content)
-
-        logger.info(f"Converted {len(markdown_content.splitlines())} lines of markdown")
+        # Send a GET request to the URL (absolute URLs bypass the NWS
+        # base_url), keeping at most MAX_RESPONSE_BYTES of the body; override
+        # the client's GeoJSON Accept header, which is only meant for NWS
+        async with _HTTP.stream(
+            "GET", url,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,*/*;q=0.8"}
+        ) as response:
+            response.raise_for_status()  # Raise an exception for bad status codes
+            body = await _read_capped(response, truncate=True)
+            html = body.decode(response.encoding or 'utf-8', errors='replace')
+
+        # Extract the main content as Markdown; trafilatura's compiled HTML
+        # parser is much faster than the old markdownify/BeautifulSoup
+        # pipeline and already collapses redundant whitespace
+        markdown_content = trafilatura.extract(
+            html, output_format='markdown', include_links=True)
+
+        if not markdown_content:
+            # Fall back to the raw text nodes when no main content is found
+            from selectolax.parser import HTMLParser
+            markdown_content = HTMLParser(html).text(separator="\n").strip()
+
+        logger.info("Converted %d lines of markdown", len(markdown_content.splitlines()))
         return markdown_content
 
-    except RequestException as e:
+    except httpx.HTTPError as e:
         return f"Error fetching the webpage: {str(e)}"
     except Exception as e:
         return f"An unexpected error occurred: {str(e)}"
 
-# @mcp.tool()
-# def validate_links(urls: list[str]) -> list[str, bool]:
-#     """Validates that the links are valid webpages.
-#
-#     Args:
-#         urls: The URLs of the webpages to visit.
-#
-#     Returns:
-#         A list of the url and boolean of whether or not the link is valid.
-#     """
-#     logger.info(f"Validating links: {urls}")
-#     output = []
-#     for url in urls:
-#         try:
-#             # Send a GET request to the URL
-#             response = requests.get(url, timeout=30)
-#             response.raise_for_status()  # Raise an exception for bad status codes
-#             print('validateResponse', response)
-#             # Check if the response content is not empty
-#             if response.text.strip():
-#                 output.append([url, True])
-#             else:
-#                 output.append([url, False])
-#         except RequestException as e:
-#             output.append([url, False])
-#             print(f"Error fetching the webpage: {str(e)}")
-#         except Exception as e:
-#             output.append([url, False])
-#             print(f"An unexpected error occurred: {str(e)}")
-#     logger.info(f"Validated {len(output)} links")
-#     return output
-
 if __name__ == "__main__":
     # Initialize and run the server
     logger.info("Starting MCP server")